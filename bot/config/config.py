@@ -9,17 +9,28 @@ class BotConfig:
 
     BOT_TOKEN: str
     DEBUG: bool = False
+    MAX_CONCURRENT_UPDATES: int = 32
+    WEBHOOK_URL: str = ''
+    WEBHOOK_PATH: str = '/webhook'
+    WEBHOOK_SECRET: Optional[str] = None
+    PORT: int = 8080
 
     @classmethod
     def load(cls) -> None:
         """Load configuration from environment variables."""
         cls.BOT_TOKEN = os.getenv('BOT_TOKEN', '')
         cls.DEBUG = os.getenv('DEBUG', 'false').lower() == 'true'
+        cls.MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', '32'))
+        cls.WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+        cls.WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+        cls.WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET') or None
+        cls.PORT = int(os.getenv('PORT', '8080'))
 
     @classmethod
     def validate(cls) -> bool:
         """Validate configuration."""
-        return bool(cls.BOT_TOKEN)
+        # A zero limit would block every update forever without an error
+        return bool(cls.BOT_TOKEN) and cls.MAX_CONCURRENT_UPDATES >= 1
 
 
 # Load configuration on import
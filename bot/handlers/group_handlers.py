@@ -1,6 +1,9 @@
 """Group command handlers."""
 
-from aiogram import Router
+import html
+from typing import Final
+
+from aiogram import Router, Bot, F
 from aiogram.filters import Command
 from aiogram.types import Message
 
@@ -8,25 +11,36 @@ from bot.services.game_state import game_manager, GameState
 from bot.utils import is_admin
 
 group_router = Router()
+group_router.message.filter(F.chat.type.in_({'group', 'supergroup'}))
+
+_GROUP_HELP: Final[str] = (
+    "🎮 <b>Игра «Угадай персонажа»</b>\n\n"
+    "<b>Правила:</b>\n"
+    "• Один игрок загадывает персонажа\n"
+    "• Остальные задают вопросы\n"
+    "• Загадывающий отвечает кнопками: Да/Нет/Не знаю/Частично\n"
+    "• Когда кто-то угадал, нажмите «✅ Угадали!»\n\n"
+    "<b>Команды:</b>\n"
+    "/startgame — начать новую игру\n"
+    "/endgame — завершить игру (для загадывающего или админа)\n"
+    "/status — показать статус игры\n"
+    "/help — показать эту справку"
+)
+
+_MYGAME_WARNING: Final[str] = (
+    "⚠️ Команда /mygame работает только в личных сообщениях бота. "
+    "Нажмите на имя бота и напишите /mygame там."
+)
+
+# End-of-game templates; the character must be HTML-escaped before formatting
+_ENDGAME_WINNER = "🎉 <b>Игра окончена!</b>\nПобедитель: %s\nЗагаданный персонаж был: <b>%s</b>"
+_ENDGAME_RESULT = "Игра окончена. Загаданный персонаж был: <b>%s</b>"
 
 
 @group_router.message(Command('start', 'help'))
 async def cmd_start_help(message: Message):
     """Handle /start and /help commands in groups."""
-    help_text = (
-        "🎮 <b>Игра «Угадай персонажа»</b>\n\n"
-        "<b>Правила:</b>\n"
-        "• Один игрок загадывает персонажа\n"
-        "• Остальные задают вопросы\n"
-        "• Загадывающий отвечает кнопками: Да/Нет/Не знаю/Частично\n"
-        "• Когда кто-то угадал, нажмите «✅ Угадали!»\n\n"
-        "<b>Команды:</b>\n"
-        "/startgame — начать новую игру\n"
-        "/endgame — завершить игру (для загадывающего или админа)\n"
-        "/status — показать статус игры\n"
-        "/help — показать эту справку"
-    )
-    await message.answer(help_text, parse_mode='HTML')
+    await message.answer(_GROUP_HELP, parse_mode='HTML')
 
 
 @group_router.message(Command('startgame'))
@@ -51,35 +65,42 @@ async def cmd_startgame(message: Message):
 
 
 @group_router.message(Command('endgame'))
-async def cmd_endgame(message: Message):
+async def cmd_endgame(message: Message, bot: Bot):
     """Handle /endgame command in groups."""
     chat_id = message.chat.id
     user_id = message.from_user.id
 
     game = game_manager.get_game(chat_id)
 
-    if not game or game.state == GameState.IDLE:
+    if not game or game.state is GameState.IDLE:
         await message.answer("Сейчас нет активной игры.")
         return
 
     # Check permissions
     if game.host_id != user_id:
-        is_user_admin = await is_admin(chat_id, user_id)
+        is_user_admin = await is_admin(chat_id, user_id, bot)
         if not is_user_admin:
             await message.answer("Завершить игру может только загадывающий или администратор.")
             return
 
-    # End game and send result
-    game_data = game_manager.end_game(chat_id)
+    # The admin check awaited Telegram, so the game may have ended or been
+    # replaced meanwhile; from here to ending the game there is no await
+    game_data = None
+    if game_manager.get_game(chat_id) is game:
+        game_data = game_manager.end_game_if_active(chat_id)
+    if game_data is None:
+        await message.answer("Сейчас нет активной игры.")
+        return
 
-    if game_data and game_data.character:
+    if game_data.character:
+        character = html.escape(game_data.character)
         if game_data.winner_username:
             await message.answer(
-                f"🎉 <b>Игра окончена!</b>\nПобедитель: {game_data.winner_username}\nЗагаданный персонаж был: <b>{game_data.character}</b>",
+                _ENDGAME_WINNER % (game_data.winner_username, character),
                 parse_mode='HTML'
             )
         else:
-            await message.answer(f"Игра окончена. Загаданный персонаж был: <b>{game_data.character}</b>", parse_mode='HTML')
+            await message.answer(_ENDGAME_RESULT % character, parse_mode='HTML')
     else:
         await message.answer("Игра остановлена до ввода персонажа.")
 
@@ -91,19 +112,25 @@ async def cmd_status(message: Message):
 
     game = game_manager.get_game(chat_id)
 
-    if not game or game.state == GameState.IDLE:
+    if not game or game.state is GameState.IDLE:
         await message.answer("Сейчас нет активной игры.")
         return
 
-    if game.state == GameState.WAITING_CHARACTER:
+    if game.state is GameState.WAITING_CHARACTER:
         username_text = f"@{game.host_username}" if game.host_username else f"ID {game.host_id}"
         await message.answer(
             f"Игра создаётся. Загадывающий: {username_text}. "
             "Ожидается, что он отправит имя персонажа боту в личку."
         )
-    elif game.state == GameState.ACTIVE:
+    elif game.state is GameState.ACTIVE:
         username_text = f"@{game.host_username}" if game.host_username else f"ID {game.host_id}"
         await message.answer(
             f"Игра идёт. Загадывающий: {username_text}. "
             "Можно задавать вопросы в чате (со знаком вопроса в конце)."
         )
+
+
+@group_router.message(Command('mygame'))
+async def cmd_mygame_warning(message: Message):
+    """Handle /mygame command in groups - warn user to use private chat."""
+    await message.answer(_MYGAME_WARNING)
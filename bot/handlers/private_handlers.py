@@ -1,6 +1,8 @@
 """Private message handlers."""
 
-from aiogram import Router, Bot
+from typing import Final
+
+from aiogram import Router, Bot, F
 from aiogram.filters import Command, StateFilter
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
@@ -10,6 +12,20 @@ from bot.services.game_state import game_manager
 from bot.keyboards import get_answer_keyboard
 
 private_router = Router()
+private_router.message.filter(F.chat.type == 'private')
+
+_PRIVATE_HELP: Final[str] = (
+    "🎮 <b>Игра «Угадай персонажа»</b>\n\n"
+    "Это бот для групповой игры в угадывание персонажа.\n\n"
+    "<b>Как играть:</b>\n"
+    "1. Напиши /startgame в групповом чате, чтобы начать игру\n"
+    "2. Ты станешь загадывающим\n"
+    "3. Отправь мне в личку команду /mygame\n"
+    "4. Затем напиши имя персонажа\n"
+    "5. Отвечай на вопросы участников в группе кнопками\n\n"
+    "<b>Команды:</b>\n"
+    "/mygame — начать ввод персонажа"
+)
 
 
 class CharacterInputState(StatesGroup):
@@ -20,19 +36,7 @@ class CharacterInputState(StatesGroup):
 @private_router.message(Command('start', 'help'))
 async def cmd_start_help(message: Message):
     """Handle /start and /help commands in private chat."""
-    help_text = (
-        "🎮 <b>Игра «Угадай персонажа»</b>\n\n"
-        "Это бот для групповой игры в угадывание персонажа.\n\n"
-        "<b>Как играть:</b>\n"
-        "1. Напиши /startgame в групповом чате, чтобы начать игру\n"
-        "2. Ты станешь загадывающим\n"
-        "3. Отправь мне в личку команду /mygame\n"
-        "4. Затем напиши имя персонажа\n"
-        "5. Отвечай на вопросы участников в группе кнопками\n\n"
-        "<b>Команды:</b>\n"
-        "/mygame — начать ввод персонажа"
-    )
-    await message.answer(help_text, parse_mode='HTML')
+    await message.answer(_PRIVATE_HELP, parse_mode='HTML')
 
 
 @private_router.message(Command('mygame'))
@@ -59,20 +63,18 @@ async def process_character_input(message: Message, state: FSMContext, bot: Bot)
     """Process character name input."""
     user_id = message.from_user.id
 
-    host_game = game_manager.get_host_game(user_id)
+    host_game = game_manager.get_waiting_host_game(user_id)
 
     if not host_game:
-        await message.answer("Ошибка: игра не найдена.")
+        if game_manager.get_host_game(user_id):
+            await message.answer("Ошибка: неверное состояние игры.")
+        else:
+            await message.answer("Ошибка: игра не найдена.")
         await state.clear()
         return
 
     chat_id, game = host_game
 
-    if not game_manager.is_waiting_for_character(chat_id, user_id):
-        await message.answer("Ошибка: неверное состояние игры.")
-        await state.clear()
-        return
-
     character = message.text.strip()
 
     if not character:
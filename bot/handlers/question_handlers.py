@@ -1,5 +1,9 @@
 """Question and callback handlers."""
 
+import html
+import re
+from typing import Optional, Tuple
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.exceptions import TelegramBadRequest
@@ -10,6 +14,9 @@ from bot.keyboards import get_answer_keyboard
 
 question_router = Router()
 
+# Text ending with '?' (trailing whitespace allowed) that is not a command
+QUESTION_PATTERN = re.compile(r'(?!\s*/).*\?\s*$', re.DOTALL)
+
 
 # Dictionary to map callback data to Russian answer text
 ANSWER_MAP = {
@@ -19,37 +26,34 @@ ANSWER_MAP = {
     'answer:partially': 'Частично',
 }
 
+# Message templates; user-provided values must be HTML-escaped before formatting
+_QUESTION_TEMPLATE = "Вопрос от %s: %s"
+_ANSWER_SUFFIX = "\n<b>Ответ: %s</b>"
+_GUESSED_SUFFIX = "\n\n🎉 <b>Правильно! Игра окончена.</b>\nЗагаданный персонаж: <b>%s</b>"
+_GUESSED_ANNOUNCEMENT = "🎉 <b>Игра окончена!</b>\nПерсонаж угадан: <b>%s</b>"
+
 
-@question_router.message()
+@question_router.message(
+    F.chat.id.in_(game_manager.active_chats),
+    F.chat.type.in_({'group', 'supergroup'}),
+    F.text.regexp(QUESTION_PATTERN) | F.caption.regexp(QUESTION_PATTERN)
+)
 async def handle_question(message: Message):
     """Handle questions in group chat."""
     chat_id = message.chat.id
 
     game = game_manager.get_game(chat_id)
 
-    if not game or game.state != GameState.ACTIVE:
+    if not game or game.state is not GameState.ACTIVE:
         return
 
     text = message.text or message.caption
 
-    if not text:
-        return
-
-    # Check if message ends with '?'
-    if not text.rstrip().endswith('?'):
-        return
-
-    # Check if message is a command (starts with '/')
-    if text.strip().startswith('/'):
-        return
-
     username = message.from_user.username
     username_text = f"@{username}" if username else f"ID {message.from_user.id}"
 
-    # Store user info for callback
-    question_text = text
-
-    response_text = f"Вопрос от {username_text}: {question_text}"
+    # Sent as plain text, so the question needs no escaping
+    response_text = _QUESTION_TEMPLATE % (username_text, text)
 
     try:
         await message.answer(
@@ -63,85 +67,99 @@ async def handle_question(message: Message):
 callback_router = Router()
 
 
-@callback_router.callback_query(F.data.startswith('answer:'))
-async def handle_answer_callback(callback: CallbackQuery):
-    """Handle answer button clicks."""
+def _check_answer_access(callback: CallbackQuery) -> Tuple[bool, Optional[str]]:
+    """Check that the callback comes from the host of an active game.
+
+    Returns whether the click can be handled and, if not, the alert to show.
+    """
     if not callback.message:
-        await callback.answer()
-        return
+        return False, None
 
     chat_id = callback.message.chat.id
-    user_id = callback.from_user.id
+
+    # Stale buttons of finished games are common, reject them cheaply
+    if chat_id not in game_manager.active_chats:
+        return False, None
 
     game = game_manager.get_game(chat_id)
 
-    if not game or game.state != GameState.ACTIVE:
-        await callback.answer()
-        return
+    if not game or game.state is not GameState.ACTIVE:
+        return False, None
 
     # Check if user is host
-    if game.host_id != user_id:
-        await callback.answer("Отвечать на вопросы может только загадывающий.")
+    if game.host_id != callback.from_user.id:
+        return False, "Отвечать на вопросы может только загадывающий."
+
+    return True, None
+
+
+async def _edit_answered_question(message: Message, text: str) -> bool:
+    """Replace question text and remove its keyboard.
+
+    Returns whether the message was edited.
+    """
+    try:
+        # editMessageText drops the inline keyboard in the same request
+        await message.edit_text(text, parse_mode='HTML', reply_markup=None)
+    except TelegramBadRequest:
+        return False
+    return True
+
+
+@callback_router.callback_query(F.data == 'answer:guessed')
+async def handle_guessed_callback(callback: CallbackQuery):
+    """Handle the "guessed" button click."""
+    allowed, alert = _check_answer_access(callback)
+    if not allowed:
+        await callback.answer(alert)
         return
 
-    # Check if it's "guessed" button
-    if callback.data == 'answer:guessed':
-        # Get username from original question message
-        username_text = f"@{callback.from_user.username}" if callback.from_user.username else f"ID {callback.from_user.id}"
-
-        # Set winner
-        game_manager.set_winner(chat_id, username_text)
-
-        # End game
-        game_data = game_manager.end_game(chat_id)
-
-        if game_data and game_data.character:
-            # Edit message to show winner and character
-            try:
-                current_text = callback.message.text or ''
-                updated_text = f"{current_text}\n\n🎉 <b>Правильно!</b>\nЗагаданный персонаж: <b>{game_data.character}</b>"
-
-                await callback.message.edit_reply_markup(reply_markup=None)
-                await callback.message.edit_text(
-                    updated_text,
-                    parse_mode='HTML'
-                )
-
-                # Send announcement to chat
-                await callback.message.answer(
-                    f"🎉 <b>Игра окончена!</b>\nУчастник {username_text} угадал персонажа: <b>{game_data.character}</b>",
-                    parse_mode='HTML'
-                )
-            except TelegramBadRequest:
-                await callback.message.answer(
-                    f"🎉 <b>Игра окончена!</b>\nУчастник {username_text} угадал персонажа: <b>{game_data.character}</b>",
-                    parse_mode='HTML'
-                )
-        else:
-            await callback.message.answer("Ошибка: персонаж не найден.")
-        await callback.answer()
+    chat_id = callback.message.chat.id
+
+    # Get username from original question message
+    username_text = f"@{callback.from_user.username}" if callback.from_user.username else f"ID {callback.from_user.id}"
+
+    # No await between the check above and ending the game, so a concurrent
+    # click cannot pass the check for the same game
+    game_data = game_manager.end_game_if_active(chat_id, winner_username=username_text)
+
+    # Acknowledge first so the button spinner does not wait for the edits
+    await callback.answer()
+
+    if game_data and game_data.character:
+        character = html.escape(game_data.character)
+        # The question was sent as plain text but is edited with HTML markup
+        updated_text = html.escape(callback.message.text or '') + _GUESSED_SUFFIX % character
+
+        # The edited question announces the result; only post separately if it cannot be edited
+        if not await _edit_answered_question(callback.message, updated_text):
+            await callback.message.answer(
+                _GUESSED_ANNOUNCEMENT % character,
+                parse_mode='HTML'
+            )
+    else:
+        await callback.message.answer("Ошибка: персонаж не найден.")
+
+
+@callback_router.callback_query(F.data.startswith('answer:'))
+async def handle_answer_callback(callback: CallbackQuery):
+    """Handle answer button clicks."""
+    allowed, alert = _check_answer_access(callback)
+    if not allowed:
+        await callback.answer(alert)
         return
 
+    # Acknowledge first so the button spinner does not wait for the edits
+    await callback.answer()
+
     # Get answer text
     answer_text = ANSWER_MAP.get(callback.data, '')
 
     if not answer_text:
-        await callback.answer()
         return
 
     # Edit message to show answer
-    try:
-        current_text = callback.message.text or ''
-        updated_text = f"{current_text}\n<b>Ответ: {answer_text}</b>"
+    # The question was sent as plain text but is edited with HTML markup
+    updated_text = html.escape(callback.message.text or '') + _ANSWER_SUFFIX % answer_text
 
-        await callback.message.edit_reply_markup(
-            reply_markup=None
-        )
-        await callback.message.edit_text(
-            updated_text,
-            parse_mode='HTML'
-        )
-
-        await callback.answer()
-    except TelegramBadRequest:
-        await callback.answer()
+    await _edit_answered_question(callback.message, updated_text)
@@ -3,13 +3,16 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 
+# The answer keyboard is static, so it is built once at import time
+_ANSWER_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text='Да', callback_data='answer:yes')],
+    [InlineKeyboardButton(text='Нет', callback_data='answer:no')],
+    [InlineKeyboardButton(text='Не знаю', callback_data='answer:dont_know')],
+    [InlineKeyboardButton(text='Частично', callback_data='answer:partially')],
+    [InlineKeyboardButton(text='✅ Угадали!', callback_data='answer:guessed')],
+])
+
+
 def get_answer_keyboard() -> InlineKeyboardMarkup:
-    """Create inline keyboard for answering questions."""
-    buttons = [
-        [InlineKeyboardButton(text='Да', callback_data='answer:yes')],
-        [InlineKeyboardButton(text='Нет', callback_data='answer:no')],
-        [InlineKeyboardButton(text='Не знаю', callback_data='answer:dont_know')],
-        [InlineKeyboardButton(text='Частично', callback_data='answer:partially')],
-        [InlineKeyboardButton(text='✅ Угадали!', callback_data='answer:guessed')],
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    """Return inline keyboard for answering questions."""
+    return _ANSWER_KEYBOARD
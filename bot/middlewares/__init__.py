@@ -0,0 +1,6 @@
+"""Middlewares module."""
+
+from .concurrency import ConcurrencyLimitMiddleware
+from .rate_limit import RateLimitMiddleware
+
+__all__ = ['ConcurrencyLimitMiddleware', 'RateLimitMiddleware']
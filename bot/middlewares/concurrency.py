@@ -0,0 +1,27 @@
+"""Concurrency limiting middleware."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """Limit the number of updates processed at the same time.
+
+    Polling runs every update as a separate task, so a burst of updates
+    would otherwise start all handlers at once.
+    """
+
+    def __init__(self, limit: int):
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self._semaphore:
+            return await handler(event, data)
@@ -0,0 +1,72 @@
+"""Outgoing request rate limiting middleware."""
+
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, GetChatAdministrators, GetUpdates, Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Requests that do not send messages and so do not count against the message limit
+_UNTHROTTLED_METHODS = (AnswerCallbackQuery, GetChatAdministrators)
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Keep outgoing requests under the bot-wide limit and honour flood waits.
+
+    Message requests are spaced by a token bucket of ``rate`` requests per
+    second. When Telegram still answers with 429, the request is retried
+    after the delay it asks for, up to ``max_retries`` times, but only if
+    that delay is at most ``max_retry_after`` seconds: the caller keeps its
+    concurrency slot and possibly a chat lock while sleeping, so long flood
+    waits are raised instead. Long polling requests are passed through
+    untouched.
+    """
+
+    def __init__(self, rate: float = 30.0, max_retries: int = 3, max_retry_after: float = 5.0):
+        self._rate = rate
+        self._max_retries = max_retries
+        self._max_retry_after = max_retry_after
+        self._tokens = rate
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def _acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._rate, self._tokens + (now - self._updated_at) * self._rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        if isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+
+        throttled = not isinstance(method, _UNTHROTTLED_METHODS)
+        retries = 0
+        while True:
+            if throttled:
+                await self._acquire()
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if retries >= self._max_retries or e.retry_after > self._max_retry_after:
+                    raise
+                retries += 1
+                logger.warning("Flood control on %s, retrying in %s s", type(method).__name__, e.retry_after)
+                await asyncio.sleep(e.retry_after)
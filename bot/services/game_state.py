@@ -5,14 +5,14 @@ from dataclasses import dataclass
 from enum import Enum
 
 
-class GameState(str, Enum):
+class GameState(Enum):
     """Game states."""
     IDLE = "idle"
     WAITING_CHARACTER = "waiting_character"
     ACTIVE = "active"
 
 
-@dataclass
+@dataclass(slots=True)
 class GameData:
     """Game data structure."""
     state: GameState = GameState.IDLE
@@ -28,14 +28,31 @@ class GameManager:
 
     def __init__(self):
         self.games: Dict[int, GameData] = {}
+        # Host user id -> chats they host, in creation order (dict used as an ordered set)
+        self._host_chats: Dict[int, Dict[int, None]] = {}
+        # Chats whose game is ACTIVE, used by router filters for fast rejection
+        self.active_chats: set[int] = set()
 
     def create_game(self, chat_id: int, host_id: int, host_username: Optional[str] = None) -> None:
         """Create a new game in waiting_character state."""
+        old_game = self.games.get(chat_id)
+        if old_game:
+            self.active_chats.discard(chat_id)
+            self._forget_host_chat(old_game.host_id, chat_id)
         self.games[chat_id] = GameData(
             state=GameState.WAITING_CHARACTER,
             host_id=host_id,
             host_username=host_username
         )
+        self._host_chats.setdefault(host_id, {})[chat_id] = None
+
+    def _forget_host_chat(self, host_id: int, chat_id: int) -> None:
+        """Remove a chat from the host index."""
+        chats = self._host_chats.get(host_id)
+        if chats is not None:
+            chats.pop(chat_id, None)
+            if not chats:
+                del self._host_chats[host_id]
 
     def get_game(self, chat_id: int) -> Optional[GameData]:
         """Get game data for a chat."""
@@ -44,49 +61,67 @@ class GameManager:
     def set_character(self, chat_id: int, character: str) -> bool:
         """Set character and transition to active state."""
         game = self.games.get(chat_id)
-        if game and game.state == GameState.WAITING_CHARACTER:
+        if game and game.state is GameState.WAITING_CHARACTER:
             game.character = character
             game.state = GameState.ACTIVE
             game.waiting_for_character = False
+            self.active_chats.add(chat_id)
             return True
         return False
 
     def set_waiting_for_character(self, chat_id: int, user_id: int, waiting: bool) -> bool:
         """Mark if user is waiting to input character."""
         game = self.games.get(chat_id)
-        if game and game.host_id == user_id and game.state == GameState.WAITING_CHARACTER:
+        if game and game.host_id == user_id and game.state is GameState.WAITING_CHARACTER:
             game.waiting_for_character = waiting
             return True
         return False
 
-    def set_winner(self, chat_id: int, username: str) -> None:
-        """Set the winner when the character is guessed correctly."""
-        game = self.games.get(chat_id)
-        if game:
-            game.winner_username = username
-
     def end_game(self, chat_id: int) -> Optional[GameData]:
         """End a game and return the game data."""
-        return self.games.pop(chat_id, None)
+        game = self.games.pop(chat_id, None)
+        self.active_chats.discard(chat_id)
+        if game:
+            self._forget_host_chat(game.host_id, chat_id)
+        return game
+
+    def end_game_if_active(self, chat_id: int, winner_username: Optional[str] = None) -> Optional[GameData]:
+        """End a game unless it is missing or idle, recording the winner if given."""
+        game = self.games.get(chat_id)
+        if game is None or game.state is GameState.IDLE:
+            return None
+        if winner_username:
+            game.winner_username = winner_username
+        return self.end_game(chat_id)
 
     def get_host_game(self, user_id: int) -> Optional[tuple[int, GameData]]:
-        """Find game where user is the host."""
-        for chat_id, game in self.games.items():
-            if game.host_id == user_id:
+        """Find game where user is the host.
+
+        A user may host games in several chats; the oldest one still waiting
+        for its character is preferred, then the oldest one.
+        """
+        chats = self._host_chats.get(user_id)
+        if not chats:
+            return None
+        for chat_id in chats:
+            game = self.games[chat_id]
+            if game.state is GameState.WAITING_CHARACTER:
+                return chat_id, game
+        chat_id = next(iter(chats))
+        return chat_id, self.games[chat_id]
+
+    def get_waiting_host_game(self, user_id: int) -> Optional[tuple[int, GameData]]:
+        """Find game where user is the host and is expected to input character."""
+        for chat_id in self._host_chats.get(user_id, ()):
+            game = self.games[chat_id]
+            if game.waiting_for_character and game.state is GameState.WAITING_CHARACTER:
                 return chat_id, game
         return None
 
-    def is_waiting_for_character(self, chat_id: int, user_id: int) -> bool:
-        """Check if user is waiting to input character."""
-        game = self.games.get(chat_id)
-        if game and game.host_id == user_id:
-            return game.waiting_for_character
-        return False
-
     def has_active_game(self, chat_id: int) -> bool:
         """Check if chat has an active game."""
         game = self.games.get(chat_id)
-        return game is not None and game.state != GameState.IDLE
+        return game is not None and game.state is not GameState.IDLE
 
 
 # Global instance
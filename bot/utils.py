@@ -1,7 +1,22 @@
 """Utility functions."""
 
+import logging
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Tuple
+
 from aiogram import Bot
-from aiogram.types import ChatMemberAdministrator, ChatMemberOwner
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# How long a chat's admin list is reused, in seconds
+ADMIN_CACHE_TTL = 300.0
+# Maximum number of chats whose admin lists are kept
+ADMIN_CACHE_SIZE = 1024
+
+# chat_id -> (fetched_at, admin user ids), least recently used first
+_admin_cache: OrderedDict[int, Tuple[float, FrozenSet[int]]] = OrderedDict()
 
 
 async def is_admin(chat_id: int, user_id: int, bot: Bot = None) -> bool:
@@ -9,8 +24,25 @@ async def is_admin(chat_id: int, user_id: int, bot: Bot = None) -> bool:
     if bot is None:
         return False
 
+    now = time.monotonic()
+    cached = _admin_cache.get(chat_id)
+    if cached and now - cached[0] < ADMIN_CACHE_TTL:
+        _admin_cache.move_to_end(chat_id)
+        return user_id in cached[1]
+
+    # One request returns every admin, which warms the cache for the whole chat
     try:
-        member = await bot.get_chat_member(chat_id, user_id)
-        return isinstance(member, (ChatMemberAdministrator, ChatMemberOwner))
-    except Exception:
+        admins = await bot.get_chat_administrators(chat_id)
+    except TelegramRetryAfter:
+        # Flood control propagates; the request middleware already retried short waits
+        raise
+    except TelegramAPIError as e:
+        logger.debug("Could not fetch admins of chat %s: %s", chat_id, e)
         return False
+
+    admin_ids = frozenset(member.user.id for member in admins)
+    _admin_cache[chat_id] = (now, admin_ids)
+    _admin_cache.move_to_end(chat_id)
+    if len(_admin_cache) > ADMIN_CACHE_SIZE:
+        _admin_cache.popitem(last=False)
+    return user_id in admin_ids